@@ -0,0 +1,48 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from config import settings
+from services.audio_separation_service import audio_separation_service
+
+router = APIRouter()
+
+
+def is_profiling_authorized(profile_header: Optional[str]) -> bool:
+    """
+    Check whether an X-Profile header value may enable profiling.
+
+    Profiling must be enabled in config. In development any value is accepted,
+    otherwise the value must match the configured profiling token.
+    """
+    if not settings.PROFILING_ENABLED or not profile_header:
+        return False
+    if settings.DEBUG:
+        return True
+    return bool(settings.PROFILING_TOKEN) and hmac.compare_digest(
+        profile_header, settings.PROFILING_TOKEN
+    )
+
+
+@router.get("/profiles")
+async def list_profiles(x_profile: Optional[str] = Header(None)):
+    """
+    List captured profiling traces (Chrome trace JSON and pstats dumps).
+
+    Requires the same X-Profile authorization as enabling a capture.
+    """
+    if not is_profiling_authorized(x_profile):
+        raise HTTPException(status_code=404, detail="Not found")
+    return {"profiles": audio_separation_service.profiler.list_traces()}
+
+
+@router.get("/profiles/{name}")
+async def get_profile(name: str, x_profile: Optional[str] = Header(None)) -> FileResponse:
+    """Download a single captured trace file."""
+    if not is_profiling_authorized(x_profile):
+        raise HTTPException(status_code=404, detail="Not found")
+    try:
+        path = audio_separation_service.profiler.get_trace_path(name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, filename=path.name)
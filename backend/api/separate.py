@@ -1,8 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Request
 from fastapi.responses import Response
+from typing import Awaitable, Optional, TypeVar
+from api.profiles import is_profiling_authorized
+from config import settings
+from infra.cancellation import SeparationCancelled
+from infra.demucs_model import NPY_DTYPES, OUTPUT_FORMATS
+from services.admission_control import AdmissionRejected
 from services.file_storage_service import FileStorageService
 from services.audio_separation_service import audio_separation_service
 import asyncio
+import math
+import time
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,9 +19,17 @@ load_dotenv()
 router = APIRouter()
 storage_service = FileStorageService()
 
+T = TypeVar("T")
+
 
 @router.post("/separate", response_class=Response)
-async def separate(file: UploadFile = File(...)) -> Response:
+async def separate(
+    request: Request,
+    file: UploadFile = File(...),
+    output_format: str = Form("zip"),
+    dtype: str = Form("float32"),
+    x_profile: Optional[str] = Header(None),
+) -> Response:
     """
     Separate a single audio file into its source stems using Demucs.
 
@@ -20,45 +37,188 @@ async def separate(file: UploadFile = File(...)) -> Response:
     for optimal Demucs compatibility, runs inference, and returns a ZIP stream
     containing separated audio stems (e.g., drums, bass, vocals, other).
 
+    When profiling is enabled in config, an authorized X-Profile header captures
+    torch.profiler and cProfile traces of the request; see GET /profiles.
+
+    Jobs that cannot finish within settings.REQUEST_TIMEOUT are rejected with 503,
+    and processing stops early if the client disconnects.
+
+    With output_format="npy" the stems are returned instead as a single .npy array
+    of shape [sources, channels, samples] in the requested dtype (float32 or float16),
+    for machine consumers. The sample rate and source order are sent in the
+    X-Sample-Rate and X-Sources headers.
+
     Returns:
-        Response: ZIP file containing separated audio stems.
+        Response: ZIP file containing separated audio stems, or the .npy array.
     Raises:
         HTTPException: if the file format is invalid or processing fails.
     """
+    deadline = time.monotonic() + settings.REQUEST_TIMEOUT
     # Validate file format using the service
     print(f"🔵 [START] Processing file: {file.filename}")
-    if not file.filename or not audio_separation_service.is_supported_format(file.filename):
-        supported_formats = ", ".join(audio_separation_service.supported_extensions)
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type. Must be one of: {supported_formats}"
-        )
+    validate_format(file.filename)
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"output_format must be one of: {', '.join(OUTPUT_FORMATS)}")
+    if output_format == "npy" and dtype not in NPY_DTYPES:
+        raise HTTPException(status_code=400, detail=f"dtype must be one of: {', '.join(NPY_DTYPES)}")
 
     audio_bytes = await file.read()
+    profile_id = uuid.uuid4().hex if is_profiling_authorized(x_profile) else None
 
     try:
         # Run audio separation
         print("Separating input")
-        zip_bytes = await audio_separation_service.separate_audio(audio_bytes, file.filename)
-        print(f"Zip output {len(zip_bytes)}")
+        output_bytes = await run_until_disconnected(
+            request,
+            audio_separation_service.separate_audio(
+                audio_bytes,
+                file.filename,
+                profile_id=profile_id,
+                deadline=deadline,
+                output_format=output_format,
+                dtype=dtype,
+            ),
+        )
+        print(f"Output {len(output_bytes)}")
+        
+        if output_format == "npy":
+            # Returned from memory as produced, without an intermediate file
+            return _npy_response(output_bytes, profile_id)
         
         # Store and stream the result
         print("Storing results")
-        file_path = await asyncio.to_thread(storage_service.store_file, zip_bytes, "zip")
+        file_path = await asyncio.to_thread(storage_service.store_file, output_bytes, "zip")
         print("streaming to user")
-        return await asyncio.to_thread(storage_service.stream_file, file_path)
+        response = await asyncio.to_thread(storage_service.stream_file, file_path)
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+        return response
         
-    except ValueError as e:
+    except Exception as e:
+        raise processing_error(e)
+
+
+@router.post("/separate/preview", response_class=Response)
+async def separate_preview(
+    request: Request,
+    file: UploadFile = File(...),
+    start: float = Form(0.0),
+    duration: float = Form(settings.PREVIEW_DEFAULT_DURATION),
+) -> Response:
+    """
+    Quickly separate a short excerpt of an audio file for instant playback.
+
+    Only the requested time range is decoded and separated, using the fast
+    preview preset. The full-quality result is still obtained from /separate.
+
+    Returns:
+        Response: ZIP file containing the separated stems of the excerpt.
+    Raises:
+        HTTPException: if the file format or time range is invalid or processing fails.
+    """
+    request_start = time.perf_counter()
+    deadline = time.monotonic() + settings.REQUEST_TIMEOUT
+    print(f"🔵 [START] Previewing file: {file.filename}")
+    validate_format(file.filename)
+    if not (math.isfinite(start) and math.isfinite(duration)) or start < 0 or duration <= 0:
+        raise HTTPException(status_code=400, detail="start must be >= 0 and duration > 0, both finite")
+    duration = min(duration, settings.PREVIEW_MAX_DURATION)
+
+    audio_bytes = await file.read()
+
+    try:
+        zip_bytes = await run_until_disconnected(
+            request,
+            audio_separation_service.separate_audio(
+                audio_bytes,
+                file.filename,
+                preset=settings.PREVIEW_PRESET,
+                start=start,
+                duration=duration,
+                deadline=deadline,
+            ),
+        )
+    except Exception as e:
+        raise processing_error(e)
+
+    # Previews are small, so they skip storage and go straight back to the client
+    processing_time = time.perf_counter() - request_start
+    print(f"Preview ready in {processing_time:.2f}s")
+    return Response(
+        content=zip_bytes,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": "attachment; filename=preview.zip",
+            "X-Processing-Time": f"{processing_time:.3f}",
+        },
+    )
+
+
+async def run_until_disconnected(request: Request, work: Awaitable[T]) -> T:
+    """
+    Await ``work`` while watching for the client to disconnect.
+
+    On disconnect the work is cancelled; a shared separation keeps running only
+    while other clients still wait for it.
+
+    Raises:
+        HTTPException: 499 if the client disconnected first.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print("Client disconnected, cancelling")
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        task.cancel()
+
+
+def _npy_response(npy_bytes: bytes, profile_id: Optional[str] = None) -> Response:
+    """Build the response for stems encoded as a .npy array."""
+    headers = {
+        "Content-Disposition": "attachment; filename=stems.npy",
+        "X-Sample-Rate": "44100",
+        "X-Sources": ",".join(audio_separation_service.model.get_source_names()),
+    }
+    if profile_id:
+        headers["X-Profile-Id"] = profile_id
+    return Response(content=npy_bytes, media_type="application/octet-stream", headers=headers)
+
+
+def validate_format(filename: Optional[str]) -> None:
+    """Reject uploads whose extension is not a supported audio format."""
+    if not filename or not audio_separation_service.is_supported_format(filename):
+        supported_formats = ", ".join(audio_separation_service.supported_extensions)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Must be one of: {supported_formats}"
+        )
+
+
+def processing_error(e: Exception) -> HTTPException:
+    """Map a separation failure to the HTTP error returned to the client."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, AdmissionRejected):
+        print(f"Rejected: {e}")
+        return HTTPException(status_code=503, detail=str(e))
+    if isinstance(e, SeparationCancelled):
+        print(f"Cancelled: {e}")
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, ValueError):
         # Audio preprocessing errors (client error)
         print(f"Value Error: {e}")
         error_msg = str(e)
         if "ffmpeg not found" in error_msg:
-            raise HTTPException(
+            return HTTPException(
                 status_code=500, 
                 detail="Server configuration error: ffmpeg required for this audio format"
             )
-        raise HTTPException(status_code=400, detail=error_msg)
-    except Exception as e:
-        # Other processing errors (server error)
-        print(f"Error processing: {e}")
-        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
\ No newline at end of file
+        return HTTPException(status_code=400, detail=error_msg)
+    # Other processing errors (server error)
+    print(f"Error processing: {e}")
+    return HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from typing import Optional
+from api.separate import processing_error, run_until_disconnected, storage_service, validate_format
+from config import settings
+from services.audio_separation_service import audio_separation_service
+from services.upload_service import upload_service
+import asyncio
+import time
+
+router = APIRouter()
+
+
+class CreateUploadRequest(BaseModel):
+    filename: str
+    size: int
+
+
+@router.post("/uploads", status_code=201)
+async def create_upload(body: CreateUploadRequest):
+    """
+    Start a resumable chunked upload.
+
+    Send the file in order with PATCH /uploads/{upload_id}, then call
+    POST /uploads/{upload_id}/finalize to run the separation.
+    """
+    validate_format(body.filename)
+    try:
+        return await asyncio.to_thread(upload_service.create_upload, body.filename, body.size)
+    except ValueError as e:
+        raise HTTPException(status_code=413 if body.size > 0 else 400, detail=str(e))
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str) -> JSONResponse:
+    """Query how many bytes of an upload have been stored, to resume after a failure."""
+    upload = await asyncio.to_thread(_get_upload_or_404, upload_id)
+    return JSONResponse(content=upload, headers={"Upload-Offset": str(upload["offset"])})
+
+
+@router.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    x_chunk_sha256: Optional[str] = Header(None),
+):
+    """
+    Append a chunk at Upload-Offset.
+
+    The raw request body is the chunk and X-Chunk-SHA256 its hex SHA-256.
+    A wrong offset returns 409 with the expected offset, so the client can resume.
+    """
+    chunk = bytearray()
+    async for part in request.stream():
+        chunk.extend(part)
+        if len(chunk) > settings.UPLOAD_MAX_CHUNK_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Chunk exceeds the maximum size of {settings.UPLOAD_MAX_CHUNK_SIZE} bytes"
+            )
+
+    try:
+        offset = await asyncio.to_thread(
+            upload_service.write_chunk, upload_id, upload_offset, bytes(chunk), x_chunk_sha256
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except ValueError as e:
+        if str(e).startswith("Offset mismatch"):
+            current = await asyncio.to_thread(_get_upload_or_404, upload_id)
+            raise HTTPException(
+                status_code=409, detail=str(e), headers={"Upload-Offset": str(current["offset"])}
+            )
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"upload_id": upload_id, "offset": offset}
+
+
+@router.post("/uploads/{upload_id}/finalize", response_class=Response)
+async def finalize_upload(upload_id: str, request: Request) -> Response:
+    """
+    Complete an upload and separate it.
+
+    The assembled file is decoded in place. It is removed once the separation
+    succeeds or the audio turns out to be undecodable. After a transient failure
+    (busy server, deadline, disconnect) it is kept so finalize can be retried,
+    until the stale-upload cleanup removes it.
+
+    Returns:
+        Response: ZIP file containing separated audio stems.
+    """
+    deadline = time.monotonic() + settings.REQUEST_TIMEOUT
+    try:
+        upload = await asyncio.to_thread(upload_service.finalize_upload, upload_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    print(f"🔵 [START] Processing upload: {upload['filename']}")
+    try:
+        zip_bytes = await run_until_disconnected(
+            request,
+            audio_separation_service.separate_file(upload["path"], upload["filename"], deadline=deadline),
+        )
+    except Exception as e:
+        error = processing_error(e)
+        if error.status_code == 400:
+            # The audio itself is bad, a retry cannot succeed
+            await asyncio.to_thread(upload_service.delete_upload, upload_id)
+        raise error
+
+    await asyncio.to_thread(upload_service.delete_upload, upload_id)
+    try:
+        file_path = await asyncio.to_thread(storage_service.store_file, zip_bytes, "zip")
+        return await asyncio.to_thread(storage_service.stream_file, file_path)
+    except Exception as e:
+        raise processing_error(e)
+
+
+def _get_upload_or_404(upload_id: str) -> dict:
+    try:
+        return upload_service.get_upload(upload_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
@@ -0,0 +1,232 @@
+"""
+Offline batch separation for directory-scale backfills.
+
+Walks input directories for supported audio files, separates them across a
+pool of worker processes and writes one WAV per stem to an output tree that
+mirrors the inputs, so input directory names must be distinct:
+
+    OUTPUT/<input dir name>/<relative path of the track>/<stem>.wav
+
+Progress is appended to OUTPUT/manifest.jsonl, so an interrupted run can be
+restarted with the same arguments and only processes unfinished tracks.
+
+Usage (from the backend directory):
+    python batch.py /data/catalog -o /data/stems --workers 4 --threads 2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import torch
+import torchaudio
+from demucs.pretrained import get_model
+from config_loader import config
+from infra.demucs_model import DEFAULT_PRESETS, DemucsModel
+from infra.ffmpeg_processor import AudioProcessor
+
+MANIFEST_NAME = "manifest.jsonl"
+
+# Per-process state, set up once by _init_worker
+_processor: Optional[AudioProcessor] = None
+_model: Optional[DemucsModel] = None
+_init_error: Optional[str] = None
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    """
+    Pin torch threads and load the model once per worker process.
+
+    Failures are recorded rather than raised: a raising initializer makes the
+    pool respawn workers forever, while a failed job stops the run.
+    """
+    global _processor, _model, _init_error
+    try:
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+        _processor = AudioProcessor()
+        _model = DemucsModel(model_name)
+    except Exception as e:
+        _init_error = f"{type(e).__name__}: {e}"
+
+
+def _separate_track(job: Tuple[str, str, str]) -> Dict:
+    """
+    Separate one track and write its stems; runs in a worker process.
+
+    Stems are written under a temporary name and renamed, so a stem file that
+    exists is always complete.
+    """
+    if _init_error is not None:
+        raise RuntimeError(f"Worker failed to start: {_init_error}")
+
+    input_path, output_dir, preset = job
+    source_names = _model.get_source_names()
+    if all(os.path.exists(os.path.join(output_dir, f"{name}.wav")) for name in source_names):
+        return {"input": input_path, "status": "skipped"}
+
+    started = time.perf_counter()
+    try:
+        waveform, sample_rate = _processor.load_waveform(input_path)
+        audio_seconds = waveform.shape[-1] / sample_rate
+        sources = _model.separate_waveform(waveform, sample_rate, preset)
+
+        os.makedirs(output_dir, exist_ok=True)
+        for name, stem in zip(source_names, sources):
+            stem_path = os.path.join(output_dir, f"{name}.wav")
+            tmp_path = os.path.join(output_dir, f".{name}.tmp.wav")
+            torchaudio.save(tmp_path, stem, 44100)
+            os.replace(tmp_path, stem_path)
+
+        return {
+            "input": input_path,
+            "status": "done",
+            "audio_seconds": round(audio_seconds, 3),
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+    except Exception as e:
+        return {"input": input_path, "status": "failed", "error": str(e)}
+
+
+def find_tracks(
+    input_dirs: List[Path], extensions: Tuple[str, ...], exclude: Optional[Path] = None
+) -> Iterator[Tuple[Path, Path]]:
+    """
+    Yield (input root, audio file) pairs for every supported file, in a stable order.
+
+    Files under ``exclude`` are skipped, so stems written to an output directory
+    inside an input directory are not picked up as tracks on a rerun.
+    """
+    for root in input_dirs:
+        for path in sorted(root.rglob("*")):
+            if exclude is not None and (path == exclude or exclude in path.parents):
+                continue
+            if path.is_file() and path.name.lower().endswith(extensions):
+                yield root, path
+
+
+def stem_output_dir(output_root: Path, input_root: Path, track: Path) -> Path:
+    """
+    Output directory for a track, mirroring its position under the input root.
+
+    The extension is kept so that e.g. song.wav and song.flac do not collide.
+    """
+    return output_root / input_root.name / track.relative_to(input_root)
+
+
+def load_manifest(manifest_path: Path) -> Set[str]:
+    """Inputs already recorded as done; a partially written last line is ignored."""
+    done = set()
+    if not manifest_path.exists():
+        return done
+    with open(manifest_path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("status") == "done":
+                done.add(entry["input"])
+    return done
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """Separate every pending track and return the throughput report."""
+    output_root = args.output.resolve()
+    output_root.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_root / MANIFEST_NAME
+    done = load_manifest(manifest_path)
+
+    extensions = AudioProcessor().SUPPORTED_EXTENSIONS
+
+    # Tracks whose stems already exist are skipped by the workers, which know the source names
+    jobs, skipped = [], 0
+    for input_root, track in find_tracks([d.resolve() for d in args.inputs], extensions, exclude=output_root):
+        if str(track) in done:
+            skipped += 1
+            continue
+        output_dir = stem_output_dir(output_root, input_root, track)
+        jobs.append((str(track), str(output_dir), args.preset))
+
+    print(f"{len(jobs)} track(s) to process, {skipped} already in the manifest")
+    if jobs:
+        # Load once up front so a bad model name or missing weights fail here, with
+        # the weights cached for the workers, rather than inside every worker
+        try:
+            get_model(args.model)
+        except Exception as e:
+            raise RuntimeError(f"Could not load model '{args.model}': {e}") from e
+
+    completed, failed, audio_seconds = 0, 0, 0.0
+    started = time.perf_counter()
+    # spawn avoids forking a parent that has already initialised torch
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.workers, initializer=_init_worker, initargs=(args.model, args.threads)) as pool, \
+            open(manifest_path, "a") as manifest:
+        for result in pool.imap_unordered(_separate_track, jobs):
+            if result["status"] == "skipped":
+                skipped += 1
+                continue
+            manifest.write(json.dumps(result) + "\n")
+            manifest.flush()
+            if result["status"] == "done":
+                completed += 1
+                audio_seconds += result["audio_seconds"]
+                print(f"[{completed + failed}/{len(jobs)}] {result['input']} ({result['elapsed']}s)")
+            else:
+                failed += 1
+                print(f"[{completed + failed}/{len(jobs)}] FAILED {result['input']}: {result['error']}")
+
+    wall_seconds = time.perf_counter() - started
+    return {
+        "completed": completed,
+        "failed": failed,
+        "skipped": skipped,
+        "wall_seconds": round(wall_seconds, 2),
+        "audio_seconds": round(audio_seconds, 2),
+        "tracks_per_hour": round(completed / wall_seconds * 3600, 2) if wall_seconds else 0.0,
+        "audio_seconds_per_wall_second": round(audio_seconds / wall_seconds, 3) if wall_seconds else 0.0,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", type=Path, help="Input directories to walk")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Output directory for stems and the manifest")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Torch threads per worker (default: CPU count divided by workers)")
+    parser.add_argument("--model", default=config.get("model.name", "htdemucs"), help="Demucs model name")
+    parser.add_argument("--preset", default="default", help="Inference preset from model.presets")
+    args = parser.parse_args(argv)
+
+    for input_dir in args.inputs:
+        if not input_dir.is_dir():
+            parser.error(f"{input_dir} is not a directory")
+    # Outputs are grouped by input directory name, which must therefore be unique
+    names = [input_dir.resolve().name for input_dir in args.inputs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        parser.error(f"input directories must have distinct names, got duplicates: {', '.join(duplicates)}")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.threads is not None and args.threads < 1:
+        parser.error("--threads must be at least 1")
+    presets = config.get("model.presets", DEFAULT_PRESETS)
+    if args.preset not in presets:
+        parser.error(f"unknown preset '{args.preset}', must be one of: {', '.join(presets)}")
+    if args.threads is None:
+        args.threads = max(1, cpu_count // args.workers)
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    report = run(parse_args(argv))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Time-to-first-audio benchmark.
+
+Measures how long a client waits before it has playable stems, comparing the
+preview endpoint against a full separation of the same file.
+
+Usage (from the backend directory):
+    python -m benchmarks.time_to_first_audio path/to/track.flac --runs 3
+"""
+import argparse
+import asyncio
+import json
+import mimetypes
+import statistics
+import time
+from pathlib import Path
+from httpx import ASGITransport, AsyncClient
+from main import app
+
+
+async def _time_request(client: AsyncClient, url: str, path: Path, data: dict) -> float:
+    """POST the file and return seconds until the full response body has arrived."""
+    mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    started = time.perf_counter()
+    response = await client.post(url, files={"file": (path.name, path.read_bytes(), mime_type)}, data=data)
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return elapsed
+
+
+async def run(path: Path, runs: int, duration: float, include_full: bool) -> dict:
+    """Run the benchmark and return its metrics."""
+    transport = ASGITransport(app=app)
+    results = {"file": str(path), "runs": runs, "preview_duration": duration}
+    async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        preview = [
+            await _time_request(client, "/separate/preview", path, {"duration": str(duration)})
+            for _ in range(runs)
+        ]
+        results["time_to_first_audio_preview_s"] = statistics.median(preview)
+
+        if include_full:
+            full = [await _time_request(client, "/separate", path, {}) for _ in range(runs)]
+            results["time_to_first_audio_full_s"] = statistics.median(full)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path, help="Audio file to benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="Repetitions per mode (median is reported)")
+    parser.add_argument("--duration", type=float, default=15.0, help="Preview length in seconds")
+    parser.add_argument("--no-full", action="store_true", help="Skip the full separation baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.path, args.runs, args.duration, not args.no_full))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,16 +24,43 @@ class Settings:
     
     # File Storage
     TEMP_DIR: str = os.getenv("TEMP_DIR", "/tmp")
+    MAX_FILE_SIZE: int = int(config.get("audio.max_file_size", 100)) * 1024 * 1024
+    
+    # Resumable uploads
+    UPLOAD_TTL: int = int(os.getenv("UPLOAD_TTL", config.get("uploads.ttl_seconds", 3600)))
+    UPLOAD_CLEANUP_INTERVAL: int = int(config.get("uploads.cleanup_interval_seconds", 300))
+    UPLOAD_MAX_CHUNK_SIZE: int = int(config.get("uploads.max_chunk_size", 16)) * 1024 * 1024
     
     # Model Configuration - Use YAML config with env var fallbacks
     DEMUCS_MODEL: str = os.getenv("DEMUCS_MODEL", config.get("model.name", "htdemucs"))
     
+    # Preview mode
+    PREVIEW_DEFAULT_DURATION: float = float(config.get("preview.default_duration", 15))
+    PREVIEW_MAX_DURATION: float = float(config.get("preview.max_duration", 30))
+    PREVIEW_PRESET: str = config.get("preview.preset", "fast")
+    
     # GPU Configuration
     CUDA_VISIBLE_DEVICES: str = os.getenv("CUDA_VISIBLE_DEVICES", "0")
     
     # Timeouts (seconds)
     REQUEST_TIMEOUT: int = int(os.getenv("REQUEST_TIMEOUT", 300))
     
+    # Admission control
+    ADMISSION_INITIAL_RTF_CPU: float = float(config.get("admission.initial_rtf_cpu", 1.0))
+    ADMISSION_INITIAL_RTF_GPU: float = float(config.get("admission.initial_rtf_gpu", 0.1))
+    ADMISSION_SMOOTHING: float = float(config.get("admission.smoothing", 0.2))
+    ADMISSION_SAFETY_FACTOR: float = float(config.get("admission.safety_factor", 1.2))
+    ADMISSION_STALE_AFTER: float = float(config.get("admission.stale_after", 600))
+    # How often a waiting request checks whether its client is still connected
+    DISCONNECT_POLL_INTERVAL: float = float(config.get("admission.disconnect_poll_interval", 1.0))
+    
+    # Profiling - opt-in per request, see infra/profiler.py
+    PROFILING_ENABLED: bool = os.getenv(
+        "PROFILING_ENABLED", str(config.get("profiling.enabled", False))
+    ).lower() == "true"
+    PROFILING_DIR: str = os.getenv("PROFILING_DIR", config.get("profiling.output_dir", "/tmp/profiles"))
+    PROFILING_TOKEN: str = os.getenv("PROFILING_TOKEN", config.get("profiling.token", ""))
+    
     @property
     def docs_url(self) -> str:
         """Return docs URL only in development."""
@@ -31,10 +31,33 @@ class Config:
             "model": {
                 "name": "htdemucs"
             },
+            "preview": {
+                "default_duration": 15,
+                "max_duration": 30,
+                "preset": "fast"
+            },
             "audio": {
                 "supported_formats": [".wav", ".mp3", ".flac", ".m4a", ".aiff", ".ogg"],
                 "max_file_size": 100
             },
+            "admission": {
+                "initial_rtf_cpu": 1.0,
+                "initial_rtf_gpu": 0.1,
+                "smoothing": 0.2,
+                "safety_factor": 1.2,
+                "stale_after": 600,
+                "disconnect_poll_interval": 1.0
+            },
+            "uploads": {
+                "ttl_seconds": 3600,
+                "cleanup_interval_seconds": 300,
+                "max_chunk_size": 16
+            },
+            "profiling": {
+                "enabled": False,
+                "output_dir": "/tmp/profiles",
+                "token": ""
+            },
             "api": {
                 "title": "I AM SPLITTER API",
                 "description": "AI-powered audio stem separation service",
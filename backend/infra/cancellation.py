@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class SeparationCancelled(Exception):
+    """Raised when a separation is stopped because it was cancelled or ran past its deadline."""
+
+
+class CancellationToken:
+    """
+    Thread-safe cancellation flag with an optional deadline.
+
+    Created on the event loop and checked from the worker thread running the
+    separation, so abandoned or overdue work stops at the next checkpoint.
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        Args:
+            deadline (Optional[float]): ``time.monotonic()`` value after which the
+                work counts as cancelled. None means no deadline.
+        """
+        self.deadline = deadline
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation."""
+        self._event.set()
+
+    def extend_deadline(self, deadline: float) -> None:
+        """Push the deadline back, e.g. when a later request joins the same work."""
+        if self.deadline is not None and deadline > self.deadline:
+            self.deadline = deadline
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            SeparationCancelled: If cancellation was requested or the deadline has passed.
+        """
+        if self.cancelled:
+            raise SeparationCancelled("Separation cancelled")
+        if self.expired:
+            raise SeparationCancelled("Separation exceeded its deadline")
+
+
+class CancellablePool:
+    """
+    Executor for demucs ``apply_model(pool=...)`` that checks a token per segment.
+
+    Like demucs' own ``DummyPoolExecutor`` it runs each submitted segment lazily
+    in the calling thread when its result is requested, but checks the token
+    first, so a separation stops at the next segment boundary.
+    """
+
+    class _LazyResult:
+        def __init__(self, token: CancellationToken, func: Callable, args, kwargs):
+            self.token = token
+            self.func = func
+            self.args = args
+            self.kwargs = kwargs
+
+        def result(self):
+            self.token.raise_if_cancelled()
+            return self.func(*self.args, **self.kwargs)
+
+    def __init__(self, token: CancellationToken):
+        self.token = token
+
+    def submit(self, func: Callable, *args, **kwargs) -> "CancellablePool._LazyResult":
+        return CancellablePool._LazyResult(self.token, func, args, kwargs)
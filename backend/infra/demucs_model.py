@@ -1,21 +1,35 @@
+import io
 import os
 import tempfile
+import numpy as np
 import torch
 import torchaudio
 import zipfile
-from typing import Dict, List
+from typing import Dict, List, Optional
 from torch import Tensor
 from demucs.apply import apply_model
 from torchaudio.transforms import Resample
 from demucs.pretrained import get_model
 from config_loader import config
+from infra.cancellation import CancellablePool, CancellationToken, SeparationCancelled
+
+
+# apply_model options per quality preset; "fast" trades quality for latency (previews)
+DEFAULT_PRESETS: Dict[str, Dict] = {
+    "default": {"shifts": 1, "overlap": 0.25},
+    "fast": {"shifts": 0, "overlap": 0.1},
+}
+
+# Output formats accepted by DemucsModel.separate
+OUTPUT_FORMATS = ("zip", "npy")
+NPY_DTYPES = ("float32", "float16")
 
 
 class DemucsModel:
     """
     This class loads a pretrained Demucs model and provides audio source separation
     functionality. It expects preprocessed WAV audio input and outputs a ZIP archive
-    containing the separated stems.
+    containing the separated stems, or a single .npy array for machine consumers.
     """
 
     def __init__(self, model_name: str = None):
@@ -29,20 +43,44 @@ class DemucsModel:
         self.model_name = model_name or config.get("model.name", "htdemucs")
         self.device: torch.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = get_model(self.model_name).to(self.device).eval()
-
-    def separate(self, audio_bytes: bytes) -> bytes:
+        self.presets: Dict[str, Dict] = config.get("model.presets", DEFAULT_PRESETS)
+
+    def separate(
+        self,
+        audio_bytes: bytes,
+        preset: str = "default",
+        cancel_token: Optional[CancellationToken] = None,
+        output_format: str = "zip",
+        dtype: str = "float32",
+    ) -> bytes:
         """
         Perform source separation on preprocessed WAV audio.
 
         Args:
             audio_bytes (bytes): Raw WAV audio file content (should be preprocessed).
+                For previews this is already just the requested excerpt.
+            preset (str): Name of the quality preset used for inference.
+            cancel_token (Optional[CancellationToken]): Checked at every segment
+                boundary; inference stops once it is cancelled or expired.
+            output_format (str): "zip" for WAV stems in a ZIP archive, "npy" for
+                one array (see ``encode_npy``).
+            dtype (str): Sample type of the "npy" output, "float32" or "float16".
 
         Returns:
-            bytes: A ZIP archive containing the separated source stems as WAV files.
+            bytes: A ZIP archive containing the separated source stems as WAV files,
+            or the .npy encoded stems.
             
         Raises:
+            ValueError: If the preset, output format or dtype is unknown.
+            SeparationCancelled: If the token is cancelled during inference.
             Exception: If audio loading or separation fails.
         """
+        # Checked before inference so a bad request does not cost a separation
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'. Must be one of: {', '.join(OUTPUT_FORMATS)}")
+        if output_format == "npy" and dtype not in NPY_DTYPES:
+            raise ValueError(f"Unknown dtype '{dtype}'. Must be one of: {', '.join(NPY_DTYPES)}")
+
         with tempfile.TemporaryDirectory() as tmpdir:
             input_path = os.path.join(tmpdir, "input.wav")
             
@@ -56,23 +94,10 @@ class DemucsModel:
             except Exception as e:
                 raise Exception(f"Failed to load audio: {str(e)}")
 
-            # Convert to target sample rate for Demucs (44.1kHz)
-            if original_sr != 44100:
-                resampler = Resample(orig_freq=original_sr, new_freq=44100)
-                waveform = resampler(waveform)
-
-            # Prepare waveform for model input
-            waveform = waveform.unsqueeze(0).to(self.device)  # Shape: [1, channels, time]
-
-            try:
-                # Run separation
-                with torch.no_grad():
-                    sources: Tensor = apply_model(self.model, waveform, progress=False)
-            except Exception as e:
-                raise Exception(f"Demucs separation failed: {str(e)}")
+            sources = self.separate_waveform(waveform, original_sr, preset, cancel_token)
 
-            # Remove batch dimension
-            sources = sources.squeeze(0)  # Shape: [num_sources, channels, time]
+            if output_format == "npy":
+                return self.encode_npy(sources, dtype)
 
             # Create ZIP archive with separated stems
             zip_path = os.path.join(tmpdir, "stems.zip")
@@ -83,7 +108,7 @@ class DemucsModel:
                         stem_path = os.path.join(tmpdir, f"{name}.wav")
                         
                         # Save stem as WAV file
-                        torchaudio.save(stem_path, audio.cpu(), 44100)
+                        torchaudio.save(stem_path, audio, 44100)
                         
                         # Add to ZIP archive
                         zf.write(stem_path, arcname=f"{name}.wav")
@@ -95,6 +120,86 @@ class DemucsModel:
             except Exception as e:
                 raise Exception(f"Failed to create output ZIP: {str(e)}")
 
+    def separate_waveform(
+        self,
+        waveform: Tensor,
+        sample_rate: int,
+        preset: str = "default",
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Tensor:
+        """
+        Perform source separation on an in-memory waveform.
+
+        Args:
+            waveform (Tensor): Audio of shape [channels, time].
+            sample_rate (int): Sample rate of ``waveform``; resampled to 44.1kHz if needed.
+            preset (str): Name of the quality preset used for inference.
+            cancel_token (Optional[CancellationToken]): Checked at every segment
+                boundary; inference stops once it is cancelled or expired.
+
+        Returns:
+            Tensor: Separated stems on the CPU, shape [num_sources, channels, time]
+            at 44.1kHz, ordered as ``get_source_names()``.
+
+        Raises:
+            ValueError: If the preset is unknown.
+            SeparationCancelled: If the token is cancelled during inference.
+            Exception: If separation fails.
+        """
+        if preset not in self.presets:
+            raise ValueError(f"Unknown preset '{preset}'. Must be one of: {', '.join(self.presets)}")
+        options = dict(self.presets[preset])
+        if cancel_token is not None:
+            # demucs submits every segment to this pool, which checks the token first
+            options["pool"] = CancellablePool(cancel_token)
+
+        # Convert to target sample rate for Demucs (44.1kHz)
+        if sample_rate != 44100:
+            resampler = Resample(orig_freq=sample_rate, new_freq=44100)
+            waveform = resampler(waveform)
+
+        # Prepare waveform for model input
+        waveform = waveform.unsqueeze(0).to(self.device)  # Shape: [1, channels, time]
+
+        try:
+            # Run separation
+            with torch.no_grad():
+                sources: Tensor = apply_model(self.model, waveform, progress=False, **options)
+        except SeparationCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"Demucs separation failed: {str(e)}")
+
+        # Remove batch dimension
+        return sources.squeeze(0).cpu()  # Shape: [num_sources, channels, time]
+
+    @staticmethod
+    def encode_npy(sources: Tensor, dtype: str = "float32") -> bytes:
+        """
+        Encode separated stems as a single .npy array, straight from the tensor.
+
+        The array has shape [num_sources, channels, samples] in C order, so it can
+        be memory-mapped with ``np.load(path, mmap_mode="r")``. Source order
+        matches ``get_source_names()`` and the sample rate is 44.1kHz.
+
+        Args:
+            sources (Tensor): Stems as returned by ``separate_waveform``.
+            dtype (str): "float32" or "float16".
+
+        Returns:
+            bytes: The .npy file content.
+
+        Raises:
+            ValueError: If the dtype is not supported.
+        """
+        if dtype not in NPY_DTYPES:
+            raise ValueError(f"Unknown dtype '{dtype}'. Must be one of: {', '.join(NPY_DTYPES)}")
+
+        array = sources.to(getattr(torch, dtype)).contiguous().numpy()
+        buffer = io.BytesIO()
+        np.lib.format.write_array(buffer, array, allow_pickle=False)
+        return buffer.getvalue()
+
     def get_source_names(self) -> List[str]:
         """
         Get the names of the audio sources this model separates.
@@ -3,6 +3,7 @@ import tempfile
 import torchaudio
 import torch
 import subprocess
+from typing import Optional, Tuple
 from config_loader import config
 
 
@@ -19,13 +20,21 @@ class AudioProcessor:
         self.SUPPORTED_EXTENSIONS = tuple(config.get("audio.supported_formats", 
                                                      [".wav", ".mp3", ".aif", ".aiff", ".m4a", ".flac", ".ogg"]))
     
-    def preprocess_audio(self, audio_bytes: bytes, original_filename: str = "input") -> bytes:
+    def preprocess_audio(
+        self,
+        audio_bytes: bytes,
+        original_filename: str = "input",
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+    ) -> bytes:
         """
         Preprocess audio bytes into a standardized WAV format.
         
         Args:
             audio_bytes (bytes): Raw audio file content in any supported format
             original_filename (str): Original filename for format detection
+            start (Optional[float]): Offset in seconds to start decoding from
+            duration (Optional[float]): Seconds to decode; None decodes to the end
             
         Returns:
             bytes: Preprocessed audio as WAV format bytes
@@ -34,33 +43,38 @@ class AudioProcessor:
             # Determine file extension for format detection
             file_ext = self._get_file_extension(original_filename)
             input_path = os.path.join(tmpdir, f"input{file_ext}")
-            intermediate_path = os.path.join(tmpdir, "converted.wav")
-            output_path = os.path.join(tmpdir, "preprocessed.wav")
             
             # Write input bytes to temporary file
             with open(input_path, "wb") as f:
                 f.write(audio_bytes)
             
-            # Try to load with torchaudio first
-            try:
-                waveform, sample_rate = torchaudio.load(input_path)
-                use_ffmpeg_fallback = False
-            except Exception as e:
-                # If torchaudio fails, use FFmpeg to convert to WAV first
-                print(f"torchaudio failed for {file_ext}, using ffmpeg fallback: {e}")
-                use_ffmpeg_fallback = True
-            
-            if use_ffmpeg_fallback:
-                # Use FFmpeg to convert to WAV format that torchaudio can handle
-                self._convert_with_ffmpeg(input_path, intermediate_path)
-                waveform, sample_rate = torchaudio.load(intermediate_path)
-            
-            # Normalize channels (ensure stereo)
-            waveform = self._normalize_channels(waveform)
+            return self.preprocess_file(input_path, start, duration)
+    
+    def preprocess_file(
+        self,
+        input_path: str,
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+    ) -> bytes:
+        """
+        Preprocess an audio file on disk into a standardized WAV format.
+        
+        Decodes directly from ``input_path``, so callers that already have the
+        file on disk (e.g. finished chunked uploads) avoid another copy.
+        
+        Args:
+            input_path (str): Path to an audio file in any supported format;
+                its extension is used for format detection
+            start (Optional[float]): Offset in seconds to start decoding from
+            duration (Optional[float]): Seconds to decode; None decodes to the end
             
-            # Ensure float32 format for consistency
-            if waveform.dtype != torch.float32:
-                waveform = waveform.float()
+        Returns:
+            bytes: Preprocessed audio as WAV format bytes
+        """
+        waveform, sample_rate = self.load_waveform(input_path, start, duration)
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, "preprocessed.wav")
             
             # Save as standardized WAV file
             torchaudio.save(
@@ -75,17 +89,100 @@ class AudioProcessor:
             with open(output_path, "rb") as f:
                 return f.read()
     
+    def load_waveform(
+        self,
+        input_path: str,
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+    ) -> Tuple[torch.Tensor, int]:
+        """
+        Decode an audio file on disk into a normalized stereo float32 waveform.
+        
+        Args:
+            input_path (str): Path to an audio file in any supported format;
+                its extension is used for format detection
+            start (Optional[float]): Offset in seconds to start decoding from
+            duration (Optional[float]): Seconds to decode; None decodes to the end
+            
+        Returns:
+            Tuple[torch.Tensor, int]: Waveform of shape [2, time] and its sample rate
+        """
+        file_ext = self._get_file_extension(input_path)
+        
+        # Try to load with torchaudio first
+        try:
+            waveform, sample_rate = self._load_range(input_path, start, duration)
+            use_ffmpeg_fallback = False
+        except Exception as e:
+            # If torchaudio fails, use FFmpeg to convert to WAV first
+            print(f"torchaudio failed for {file_ext}, using ffmpeg fallback: {e}")
+            use_ffmpeg_fallback = True
+        
+        if use_ffmpeg_fallback:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                intermediate_path = os.path.join(tmpdir, "converted.wav")
+                # Use FFmpeg to convert to WAV format that torchaudio can handle,
+                # it already trims to the requested range
+                self._convert_with_ffmpeg(input_path, intermediate_path, start, duration)
+                waveform, sample_rate = torchaudio.load(intermediate_path)
+        
+        if waveform.shape[-1] == 0:
+            raise ValueError("Requested time range is outside the audio")
+        
+        # Normalize channels (ensure stereo)
+        waveform = self._normalize_channels(waveform)
+        
+        # Ensure float32 format for consistency
+        if waveform.dtype != torch.float32:
+            waveform = waveform.float()
+        
+        return waveform, sample_rate
+    
     def is_supported_format(self, filename: str) -> bool:
         """Check if the given filename has a supported audio format."""
         if not filename:
             return False
         return filename.lower().endswith(self.SUPPORTED_EXTENSIONS)
     
-    def _convert_with_ffmpeg(self, input_path: str, output_path: str) -> None:
-        """Convert audio file to WAV using FFmpeg as a fallback."""
+    def _load_range(
+        self,
+        input_path: str,
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+    ) -> Tuple[torch.Tensor, int]:
+        """
+        Load audio with torchaudio, decoding only the requested time range.
+
+        The range is turned into a frame offset and count so the backend seeks
+        instead of decoding the whole file.
+        """
+        if start is None and duration is None:
+            return torchaudio.load(input_path)
+
+        sample_rate = torchaudio.info(input_path).sample_rate
+        frame_offset = int((start or 0.0) * sample_rate)
+        num_frames = int(duration * sample_rate) if duration is not None else -1
+        return torchaudio.load(input_path, frame_offset=frame_offset, num_frames=num_frames)
+
+    def _convert_with_ffmpeg(
+        self,
+        input_path: str,
+        output_path: str,
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+    ) -> None:
+        """Convert audio file (or a time range of it) to WAV using FFmpeg as a fallback."""
+        # -ss/-t before -i make ffmpeg seek in the input rather than decode and discard
+        range_args = []
+        if start:
+            range_args += ["-ss", str(start)]
+        if duration is not None:
+            range_args += ["-t", str(duration)]
+
         try:
             cmd = [
                 "ffmpeg", 
+                *range_args,
                 "-i", input_path,
                 "-ar", "44100",        # Set sample rate to 44.1kHz
                 "-ac", "2",            # Convert to stereo
@@ -1,5 +1,9 @@
+import json
+import os
+import time
 import uuid
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
 from fastapi.responses import StreamingResponse
 
 
@@ -64,6 +68,163 @@ class FileRepository:
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
 
+    def create_upload(self, filename: str, total_size: int) -> str:
+        """
+        Start a resumable upload by creating an empty partial file and its metadata.
+
+        Args:
+            filename (str): Original filename of the upload, kept for format detection.
+            total_size (int): Expected final size in bytes.
+
+        Returns:
+            str: Identifier of the new upload.
+        """
+        upload_dir = self._upload_dir()
+        upload_id = uuid.uuid4().hex
+        (upload_dir / f"{upload_id}.part").touch()
+        self._write_upload_meta(upload_id, {
+            "filename": filename,
+            "size": total_size,
+            "created": time.time(),
+        })
+        return upload_id
+
+    def get_upload(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Get the metadata and current offset of an upload.
+
+        Works for uploads still receiving chunks and for already assembled ones;
+        ``assembled`` tells them apart and ``path`` points at the current file.
+
+        Raises:
+            FileNotFoundError: If the upload does not exist or has been cleaned up.
+        """
+        part_path, meta_path = self._upload_paths(upload_id)
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Upload {upload_id} does not exist")
+
+        meta = json.loads(meta_path.read_text())
+        assembled_path = self._assembled_path(upload_id, meta["filename"])
+        if part_path.exists():
+            data_path, meta["assembled"] = part_path, False
+        elif assembled_path.exists():
+            data_path, meta["assembled"] = assembled_path, True
+        else:
+            raise FileNotFoundError(f"Upload {upload_id} does not exist")
+
+        meta["offset"] = data_path.stat().st_size
+        meta["path"] = str(data_path)
+        return meta
+
+    def write_chunk(self, upload_id: str, offset: int, chunk: bytes) -> int:
+        """
+        Write a chunk to the partial file at the given offset.
+
+        Chunks must be appended in order: the offset has to match the number of
+        bytes already received, so a client resuming after a failure first
+        queries the offset and continues from there.
+
+        Args:
+            upload_id (str): Identifier of the upload.
+            offset (int): Byte offset the chunk starts at.
+            chunk (bytes): Chunk content.
+
+        Returns:
+            int: The new offset after the write.
+
+        Raises:
+            FileNotFoundError: If the upload does not exist.
+            ValueError: If the offset does not match, the chunk overflows the upload
+                or the upload has already been finalized.
+        """
+        meta = self.get_upload(upload_id)
+        if meta["assembled"]:
+            raise ValueError("Upload has already been finalized")
+        if offset != meta["offset"]:
+            raise ValueError(f"Offset mismatch: expected {meta['offset']}, got {offset}")
+        if offset + len(chunk) > meta["size"]:
+            raise ValueError("Chunk exceeds the declared upload size")
+
+        with open(meta["path"], "r+b") as f:
+            f.seek(offset)
+            f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        return offset + len(chunk)
+
+    def finalize_upload(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Check that an upload is complete and assemble it into its final file.
+
+        The partial file is renamed to carry the original extension, so decoders
+        can detect the format; the data itself is not copied. Finalizing an
+        already assembled upload (a retry) returns it unchanged.
+
+        Returns:
+            Dict[str, Any]: Upload metadata, with ``path`` pointing at the assembled file.
+
+        Raises:
+            FileNotFoundError: If the upload does not exist.
+            ValueError: If not all bytes have been received.
+        """
+        meta = self.get_upload(upload_id)
+        if meta["offset"] != meta["size"]:
+            raise ValueError(f"Upload incomplete: received {meta['offset']} of {meta['size']} bytes")
+
+        assembled_path = self._assembled_path(upload_id, meta["filename"])
+        if not meta["assembled"]:
+            os.replace(meta["path"], assembled_path)
+        os.utime(assembled_path)  # keep it clear of stale-upload cleanup while it is processed
+        meta["path"] = str(assembled_path)
+        meta["assembled"] = True
+        return meta
+
+    def delete_upload(self, upload_id: str) -> None:
+        """Remove every file belonging to an upload (partial, assembled and metadata)."""
+        self._upload_paths(upload_id)  # validates the id before globbing with it
+        for path in self._upload_dir().glob(f"{upload_id}*"):
+            path.unlink(missing_ok=True)
+
+    def cleanup_stale_uploads(self, max_age_seconds: float) -> List[str]:
+        """
+        Delete uploads that have had no activity for longer than ``max_age_seconds``.
+
+        Returns:
+            List[str]: Identifiers of the uploads removed.
+        """
+        cutoff = time.time() - max_age_seconds
+        upload_dir = self._upload_dir()
+        removed = []
+        for meta_path in upload_dir.glob("*.json"):
+            upload_id = meta_path.stem
+            try:
+                last_activity = max(p.stat().st_mtime for p in upload_dir.glob(f"{upload_id}*"))
+            except (FileNotFoundError, ValueError):
+                continue
+            if last_activity < cutoff:
+                self.delete_upload(upload_id)
+                removed.append(upload_id)
+        return removed
+
+    def _assembled_path(self, upload_id: str, filename: str) -> Path:
+        return self._upload_dir() / f"{upload_id}{Path(filename).suffix.lower()}"
+
+    def _upload_dir(self) -> Path:
+        upload_dir = self.base_dir / "uploads"
+        upload_dir.mkdir(exist_ok=True)
+        return upload_dir
+
+    def _upload_paths(self, upload_id: str) -> Tuple[Path, Path]:
+        """Paths of the partial file and metadata; the id must be a plain hex token."""
+        if not upload_id.isalnum():
+            raise FileNotFoundError(f"Upload {upload_id} does not exist")
+        upload_dir = self._upload_dir()
+        return upload_dir / f"{upload_id}.part", upload_dir / f"{upload_id}.json"
+
+    def _write_upload_meta(self, upload_id: str, meta: Dict[str, Any]) -> None:
+        _, meta_path = self._upload_paths(upload_id)
+        meta_path.write_text(json.dumps(meta))
+
 
 def create_file_repository() -> FileRepository:
     """
@@ -0,0 +1,141 @@
+import cProfile
+import functools
+import re
+import threading
+import time
+import torch
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from torch.profiler import ProfilerActivity, profile
+
+# torch.profiler is process-wide, so only one capture may run at a time
+_capture_lock = threading.Lock()
+
+
+class RequestProfiler:
+    """
+    Captures torch.profiler and cProfile traces for a single pipeline stage.
+
+    Each captured stage produces two files under the output directory:
+    a Chrome trace (``.trace.json``, open in chrome://tracing or Perfetto)
+    and a pstats dump (``.pstats``, load with ``pstats.Stats``).
+
+    Captures are serialized: a stage that starts while another capture is
+    running is executed unprofiled. Profiling failures are logged and never
+    fail the profiled call. torch.profiler still records ops from unprofiled
+    requests running at the same time; the pstats dump covers only the
+    profiled thread.
+    """
+
+    TRACE_SUFFIX = ".trace.json"
+    STATS_SUFFIX = ".pstats"
+
+    def __init__(self, output_dir: str = "/tmp/profiles"):
+        self.output_dir = Path(output_dir)
+
+    def wrap(self, func: Callable, profile_id: str, stage: str) -> Callable:
+        """
+        Wrap a callable so that every call to it is profiled.
+
+        The wrapped callable must run in the thread doing the work (e.g. inside
+        ``asyncio.to_thread``), since cProfile only observes the calling thread.
+
+        Args:
+            func (Callable): The function to profile.
+            profile_id (str): Identifier shared by all stages of one request.
+            stage (str): Stage name used in the output filenames.
+
+        Returns:
+            Callable: The profiled function.
+        """
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            return self.run(profile_id, stage, func, *args, **kwargs)
+
+        return profiled
+
+    def run(self, profile_id: str, stage: str, func: Callable, *args, **kwargs) -> Any:
+        """Run ``func`` under both profilers and write the traces to disk."""
+        if not _capture_lock.acquire(blocking=False):
+            print(f"Profiler busy, running {stage} for {profile_id} unprofiled")
+            return func(*args, **kwargs)
+
+        try:
+            base = self.output_dir / f"{self._safe_name(profile_id)}_{self._safe_name(stage)}"
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                torch_prof = profile(activities=activities, record_shapes=True)
+                torch_prof.start()
+            except Exception as e:
+                print(f"Failed to start profiler for {base.name}, running unprofiled: {e}")
+                return func(*args, **kwargs)
+
+            cprof = cProfile.Profile()
+            cprof.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cprof.disable()
+                try:
+                    torch_prof.stop()
+                except Exception as e:
+                    print(f"Failed to stop profiler for {base.name}: {e}")
+                # Traces are written even if the stage fails, that is often the interesting case
+                self._write_traces(cprof, torch_prof, base)
+        finally:
+            _capture_lock.release()
+
+    def _write_traces(self, cprof: cProfile.Profile, torch_prof: profile, base: Path) -> None:
+        """Write both traces, logging rather than raising on failure."""
+        try:
+            cprof.dump_stats(f"{base}{self.STATS_SUFFIX}")
+        except Exception as e:
+            print(f"Failed to write pstats for {base.name}: {e}")
+        try:
+            torch_prof.export_chrome_trace(f"{base}{self.TRACE_SUFFIX}")
+        except Exception as e:
+            print(f"Failed to write Chrome trace for {base.name}: {e}")
+
+    def list_traces(self) -> List[Dict[str, Any]]:
+        """
+        List captured trace files, newest first.
+
+        Returns:
+            List[Dict[str, Any]]: Filename, size and modification time per trace.
+        """
+        if not self.output_dir.exists():
+            return []
+
+        traces = []
+        for path in self.output_dir.iterdir():
+            if not path.name.endswith((self.TRACE_SUFFIX, self.STATS_SUFFIX)):
+                continue
+            stat = path.stat()
+            traces.append({
+                "name": path.name,
+                "size": stat.st_size,
+                "modified": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(stat.st_mtime)),
+            })
+
+        traces.sort(key=lambda t: t["modified"], reverse=True)
+        return traces
+
+    def get_trace_path(self, name: str) -> Path:
+        """
+        Resolve a trace filename inside the output directory.
+
+        Raises:
+            FileNotFoundError: If the name is not a trace in the output directory.
+        """
+        path = self.output_dir / Path(name).name
+        if not path.name.endswith((self.TRACE_SUFFIX, self.STATS_SUFFIX)) or not path.is_file():
+            raise FileNotFoundError(f"{name} does not exist")
+        return path
+
+    @staticmethod
+    def _safe_name(value: str) -> str:
+        """Restrict a user supplied identifier to filename-safe characters."""
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", value)[:64] or "profile"
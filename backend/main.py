@@ -2,8 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.cors import CORSMiddleware  # Add this import
 from contextlib import asynccontextmanager
+import asyncio
 from config import settings
 from api.separate import router
+from api.profiles import router as profiles_router
+from api.uploads import router as uploads_router
+from services.upload_service import upload_service
 from infra.demucs_model import DemucsModel
 
 @asynccontextmanager
@@ -14,13 +18,27 @@ async def lifespan(app: FastAPI):
         print("Audio Separation API starting in development mode")
     else:
         print("Audio Separation API starting in production mode")
+    cleanup_task = asyncio.create_task(cleanup_stale_uploads())
     
     yield
     
     # Shutdown
+    cleanup_task.cancel()
     print("Audio Separation API shutting down")
 
 
+async def cleanup_stale_uploads():
+    """Periodically delete chunked uploads that were abandoned partway."""
+    while True:
+        try:
+            removed = await asyncio.to_thread(upload_service.cleanup_stale_uploads)
+            if removed:
+                print(f"Removed {removed} stale upload(s)")
+        except Exception as e:
+            print(f"Upload cleanup failed: {e}")
+        await asyncio.sleep(settings.UPLOAD_CLEANUP_INTERVAL)
+
+
 # Create FastAPI app with production metadata
 app = FastAPI(
     title=settings.API_TITLE,
@@ -39,6 +57,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id", "X-Processing-Time", "Upload-Offset", "X-Sample-Rate", "X-Sources"],
 )
 
 # # Security middleware for production
@@ -81,6 +100,8 @@ async def root():
 
 # Include API routes
 app.include_router(router)
+app.include_router(profiles_router)
+app.include_router(uploads_router)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job cannot finish before its deadline."""
+
+    def __init__(self, estimated_seconds: float, remaining_seconds: float):
+        self.estimated_seconds = estimated_seconds
+        self.remaining_seconds = remaining_seconds
+        super().__init__(
+            f"Estimated processing time {estimated_seconds:.1f}s exceeds "
+            f"the remaining {max(remaining_seconds, 0.0):.1f}s before the deadline"
+        )
+
+
+class AdmissionController:
+    """
+    Deadline-aware admission control for separation jobs.
+
+    Keeps an exponential moving average of the observed real-time factor
+    (processing seconds per second of audio) per model and preset, and rejects
+    jobs whose estimated runtime does not fit before their deadline.
+
+    Only observed estimates reject jobs. Until a model and preset has finished
+    a job, and once its estimate is older than ``stale_after``, one job is
+    admitted regardless, so rejections can never keep an estimate from being
+    corrected.
+    """
+
+    def __init__(
+        self,
+        initial_rtf: float,
+        smoothing: float = 0.2,
+        safety_factor: float = 1.2,
+        stale_after: float = 600.0,
+    ):
+        """
+        Args:
+            initial_rtf (float): Real-time factor reported until a job has been observed.
+            smoothing (float): Weight of the newest observation in the moving average.
+            safety_factor (float): Multiplier on estimates to leave headroom for variance.
+            stale_after (float): Seconds after which an estimate is re-measured by
+                admitting a job that it would reject.
+        """
+        self.initial_rtf = initial_rtf
+        self.smoothing = smoothing
+        self.safety_factor = safety_factor
+        self.stale_after = stale_after
+        self._rtf: Dict[str, float] = {}
+        # When each estimate was last observed or re-probed
+        self._updated_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, model_name: str, preset: str, audio_seconds: float) -> float:
+        """Estimated separation time in seconds for ``audio_seconds`` of audio."""
+        with self._lock:
+            rtf = self._rtf.get(self._key(model_name, preset), self.initial_rtf)
+        return audio_seconds * rtf * self.safety_factor
+
+    def observe(self, model_name: str, preset: str, audio_seconds: float, elapsed_seconds: float) -> None:
+        """Record the runtime of a finished job."""
+        if audio_seconds <= 0:
+            return
+        key = self._key(model_name, preset)
+        observed = elapsed_seconds / audio_seconds
+        now = time.monotonic()
+        with self._lock:
+            previous = self._rtf.get(key)
+            if previous is None or self._is_stale(key, now):
+                # A stale estimate is replaced rather than averaged with
+                self._rtf[key] = observed
+            else:
+                self._rtf[key] = self.smoothing * observed + (1 - self.smoothing) * previous
+            self._updated_at[key] = now
+
+    def check(self, model_name: str, preset: str, audio_seconds: float, deadline: Optional[float]) -> bool:
+        """
+        Admit or reject a job.
+
+        Jobs are always admitted while there is no observed estimate for the
+        model and preset. A job that a stale estimate would reject is admitted
+        as a probe, at most once per ``stale_after`` seconds.
+
+        Args:
+            deadline (Optional[float]): ``time.monotonic()`` value the job must finish by.
+
+        Returns:
+            bool: True if the job was admitted on an observed estimate, False if
+                it was admitted without one (no deadline, cold or probing).
+
+        Raises:
+            AdmissionRejected: If the estimated runtime exceeds the time left.
+        """
+        if deadline is None:
+            return False
+        key = self._key(model_name, preset)
+        now = time.monotonic()
+        with self._lock:
+            rtf = self._rtf.get(key)
+            if rtf is None:
+                return False
+            estimated = audio_seconds * rtf * self.safety_factor
+            remaining = deadline - now
+            if estimated <= remaining:
+                return True
+            if self._is_stale(key, now):
+                # Let this job re-measure the estimate; the deadline still bounds its runtime
+                self._updated_at[key] = now
+                return False
+        raise AdmissionRejected(estimated, remaining)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Current real-time factor per model and preset."""
+        with self._lock:
+            return dict(self._rtf)
+
+    def _is_stale(self, key: str, now: float) -> bool:
+        return now - self._updated_at.get(key, now) > self.stale_after
+
+    @staticmethod
+    def _key(model_name: str, preset: str) -> str:
+        return f"{model_name}:{preset}"
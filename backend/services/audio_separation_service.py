@@ -1,6 +1,29 @@
 import asyncio
+import functools
+import hashlib
+import io
+import os
+import time
+import soundfile as sf
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+from config import settings
+from infra.cancellation import CancellationToken, SeparationCancelled
 from infra.demucs_model import DemucsModel
 from infra.ffmpeg_processor import AudioProcessor
+from infra.profiler import RequestProfiler
+from services.admission_control import AdmissionController
+
+
+@dataclass
+class _InFlightSeparation:
+    """A running separation shared by every request with the same key."""
+    task: asyncio.Task
+    token: CancellationToken
+    # Resolved once the computation is admitted: the audio duration in seconds,
+    # or None if it was admitted without an observed estimate to check against
+    duration: asyncio.Future
+    waiters: int = 0
 
 
 class AudioSeparationService:
@@ -8,43 +31,274 @@ class AudioSeparationService:
     Service for running audio source separation with preprocessing.
     
     Orchestrates the full pipeline: preprocessing -> separation -> output.
+    Concurrent requests for identical content and parameters are coalesced
+    into a single in-flight computation. Every job has a deadline: requests
+    that cannot be served in time are rejected once the audio duration is
+    known, each against its own deadline, and running inference stops at the
+    next segment once nobody is waiting for it or the deadline passes.
     """
 
-    def __init__(self):
-        self.model = DemucsModel()
-        self.processor = AudioProcessor()
+    def __init__(self, model: Optional[DemucsModel] = None, processor: Optional[AudioProcessor] = None):
+        self.model = model or DemucsModel()
+        self.processor = processor or AudioProcessor()
+        self.profiler = RequestProfiler(settings.PROFILING_DIR)
+        self.admission = AdmissionController(
+            initial_rtf=(
+                settings.ADMISSION_INITIAL_RTF_GPU if self.model.device.type == "cuda"
+                else settings.ADMISSION_INITIAL_RTF_CPU
+            ),
+            smoothing=settings.ADMISSION_SMOOTHING,
+            safety_factor=settings.ADMISSION_SAFETY_FACTOR,
+            stale_after=settings.ADMISSION_STALE_AFTER,
+        )
+        self._in_flight: Dict[str, _InFlightSeparation] = {}
 
-    async def separate_audio(self, audio_bytes: bytes, filename: str = "input") -> bytes:
+    async def separate_audio(
+        self,
+        audio_bytes: bytes,
+        filename: str = "input",
+        preset: str = "default",
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+        profile_id: Optional[str] = None,
+        deadline: Optional[float] = None,
+        output_format: str = "zip",
+        dtype: str = "float32",
+    ) -> bytes:
         """
         Run audio separation with preprocessing in background threads.
 
         Args:
             audio_bytes (bytes): Raw audio input in any supported format.
             filename (str): Original filename for format detection.
+            preset (str): Inference quality preset, e.g. "fast" for previews.
+            start (Optional[float]): Offset in seconds of the excerpt to separate.
+            duration (Optional[float]): Length in seconds of the excerpt; None
+                separates to the end of the file.
+            profile_id (Optional[str]): If set, preprocessing and separation are
+                profiled and their traces saved under this identifier.
+            deadline (Optional[float]): ``time.monotonic()`` value the result is
+                needed by; defaults to now plus ``settings.REQUEST_TIMEOUT``.
+            output_format (str): "zip" for WAV stems, "npy" for a single
+                [sources, channels, samples] array.
+            dtype (str): Sample type of "npy" output, "float32" or "float16";
+                ignored for "zip".
 
         Returns:
-            bytes: ZIP archive of separated stems.
+            bytes: ZIP archive of separated stems, or the .npy array.
             
         Raises:
             ValueError: If audio preprocessing fails.
+            AdmissionRejected: If the job cannot finish before the deadline.
+            SeparationCancelled: If the deadline passes during processing.
+            Exception: If audio separation fails.
+        """
+        deadline = deadline or time.monotonic() + settings.REQUEST_TIMEOUT
+        if output_format != "npy":
+            # dtype does not affect ZIP output, so it must not split coalescing either
+            dtype = "float32"
+        preprocess = functools.partial(self.processor.preprocess_audio, audio_bytes, filename)
+        if profile_id:
+            # A profiled request must run its own computation to produce its own traces
+            token = CancellationToken(deadline)
+            try:
+                return await self._run_separation(
+                    preprocess, token, preset, start, duration, output_format, dtype, profile_id
+                )
+            except asyncio.CancelledError:
+                # Nobody else waits on this computation, stop inference at its next segment
+                token.cancel()
+                raise
+
+        content_hash = await asyncio.to_thread(lambda: hashlib.sha256(audio_bytes).hexdigest())
+        key = self._request_key(content_hash, filename, preset, start, duration, output_format, dtype)
+        return await self._coalesce(
+            key,
+            preset,
+            deadline,
+            lambda token, duration_future: self._run_separation(
+                preprocess, token, preset, start, duration, output_format, dtype,
+                duration_future=duration_future,
+            ),
+        )
+
+    async def separate_file(
+        self,
+        file_path: str,
+        filename: str,
+        preset: str = "default",
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> bytes:
+        """
+        Run audio separation on a file already on disk, e.g. a finished chunked upload.
+
+        The file is decoded in place rather than read into memory first.
+
+        Args:
+            file_path (str): Path to the audio file; its extension is used for format detection.
+            filename (str): Original filename, used for the coalescing key.
+            preset (str): Inference quality preset.
+            start (Optional[float]): Offset in seconds of the excerpt to separate.
+            duration (Optional[float]): Length in seconds of the excerpt.
+            deadline (Optional[float]): ``time.monotonic()`` value the result is
+                needed by; defaults to now plus ``settings.REQUEST_TIMEOUT``.
+
+        Returns:
+            bytes: ZIP archive of separated stems.
+
+        Raises:
+            ValueError: If audio preprocessing fails.
+            AdmissionRejected: If the job cannot finish before the deadline.
+            SeparationCancelled: If the deadline passes during processing.
             Exception: If audio separation fails.
         """
+        deadline = deadline or time.monotonic() + settings.REQUEST_TIMEOUT
+        preprocess = functools.partial(self.processor.preprocess_file, file_path)
+        content_hash = await asyncio.to_thread(self._hash_file, file_path)
+        key = self._request_key(content_hash, filename, preset, start, duration)
+        return await self._coalesce(
+            key,
+            preset,
+            deadline,
+            lambda token, duration_future: self._run_separation(
+                preprocess, token, preset, start, duration, duration_future=duration_future
+            ),
+        )
+
+    async def _coalesce(
+        self,
+        key: str,
+        preset: str,
+        deadline: float,
+        start_computation: Callable[[CancellationToken, asyncio.Future], Awaitable[bytes]],
+    ) -> bytes:
+        """
+        Attach to the in-flight computation for ``key``, starting one if there is none.
+
+        The computation itself is admitted against the most patient waiter's
+        deadline; every waiter is then admitted against its own, so a request
+        with a short deadline is rejected without failing the others.
+        """
+        entry = self._in_flight.get(key)
+        if entry is None or entry.task.done():
+            token = CancellationToken(deadline)
+            duration = asyncio.get_running_loop().create_future()
+            entry = _InFlightSeparation(
+                task=asyncio.create_task(start_computation(token, duration)), token=token, duration=duration
+            )
+            self._in_flight[key] = entry
+            entry.task.add_done_callback(lambda _: self._forget(key, entry))
+        else:
+            # The shared work may run as long as its most patient waiter allows
+            entry.token.extend_deadline(deadline)
+
+        entry.waiters += 1
+        try:
+            return await asyncio.wait_for(
+                self._wait_admitted(entry, preset, deadline), timeout=deadline - time.monotonic()
+            )
+        except asyncio.TimeoutError:
+            raise SeparationCancelled("Separation exceeded its deadline")
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                # Every waiter has gone away, stop the computation at its next segment
+                entry.token.cancel()
+                entry.task.cancel()
+                self._forget(key, entry)
+
+    async def _wait_admitted(self, entry: _InFlightSeparation, preset: str, deadline: float) -> bytes:
+        """Wait for the shared result, after admitting this waiter against its own deadline."""
+        # asyncio.wait never cancels what it waits on, so a waiter going away leaves both intact
+        await asyncio.wait({entry.task, entry.duration}, return_when=asyncio.FIRST_COMPLETED)
+        audio_seconds = entry.duration.result() if entry.duration.done() else None
+        if audio_seconds is not None and not entry.task.done():
+            self.admission.check(self.model.model_name, preset, audio_seconds, deadline)
+        # Shield so one waiter going away does not cancel the shared computation
+        return await asyncio.shield(entry.task)
+
+    async def _run_separation(
+        self,
+        preprocess: Callable[..., bytes],
+        token: CancellationToken,
+        preset: str = "default",
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+        output_format: str = "zip",
+        dtype: str = "float32",
+        profile_id: Optional[str] = None,
+        duration_future: Optional[asyncio.Future] = None,
+    ) -> bytes:
+        """
+        Run preprocessing, admission and separation for a single computation.
+
+        Once admitted, the audio duration is published on ``duration_future`` so
+        coalesced waiters can check their own deadlines.
+        """
+        separate = self.model.separate
+        if profile_id:
+            # Wrapped only on request so unprofiled calls pay nothing
+            preprocess = self.profiler.wrap(preprocess, profile_id, "preprocess_audio")
+            separate = self.profiler.wrap(separate, profile_id, "separate")
         
         # Preprocess audio in background thread
         try:
-            preprocessed_audio = await asyncio.to_thread(
-                self.processor.preprocess_audio, 
-                audio_bytes, 
-                filename
-            )
+            preprocessed_audio = await asyncio.to_thread(preprocess, start, duration)
         except ValueError as e:
             raise ValueError(f"Audio preprocessing failed: {str(e)}")
         
+        # Reject up front what cannot finish in time, rather than burning capacity on it
+        token.raise_if_cancelled()
+        audio_seconds = sf.info(io.BytesIO(preprocessed_audio)).duration
+        measured = self.admission.check(self.model.model_name, preset, audio_seconds, token.deadline)
+        if duration_future is not None and not duration_future.done():
+            duration_future.set_result(audio_seconds if measured else None)
+        
         # Run separation in background thread
+        started = time.monotonic()
         try:
-            return await asyncio.to_thread(self.model.separate, preprocessed_audio)
+            result = await asyncio.to_thread(
+                separate, preprocessed_audio, preset, token, output_format, dtype
+            )
+        except SeparationCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Audio separation failed: {str(e)}")
+        self.admission.observe(self.model.model_name, preset, audio_seconds, time.monotonic() - started)
+        return result
+
+    def _request_key(
+        self,
+        content_hash: str,
+        filename: str,
+        preset: str = "default",
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+        output_format: str = "zip",
+        dtype: str = "float32",
+    ) -> str:
+        """Build the coalescing key from content hash, model and parameters."""
+        file_ext = os.path.splitext(filename.lower())[1]
+        return (
+            f"{content_hash}:{self.model.model_name}:{file_ext}:{preset}:{start}:{duration}"
+            f":{output_format}:{dtype}"
+        )
+
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        """Hash a file in blocks without loading it into memory."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while block := f.read(1024 * 1024):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _forget(self, key: str, entry: _InFlightSeparation) -> None:
+        """Drop a finished or abandoned computation so later requests start fresh."""
+        if self._in_flight.get(key) is entry:
+            del self._in_flight[key]
 
     def is_supported_format(self, filename: str) -> bool:
         """Check if the audio format is supported."""
@@ -0,0 +1,112 @@
+import hashlib
+import hmac
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+from config import settings
+from infra.file_repo import create_file_repository
+
+
+class UploadService:
+    """
+    Resumable chunked uploads.
+
+    Chunks are verified against their SHA-256 checksum and written straight to
+    the partial file on disk, so an interrupted upload resumes from the last
+    stored offset instead of starting over.
+    """
+
+    def __init__(self):
+        self.repo = create_file_repository()
+        # Serializes writes per upload so two retries of the same chunk cannot interleave
+        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def create_upload(self, filename: str, total_size: int) -> Dict[str, Any]:
+        """
+        Start a new upload.
+
+        Raises:
+            ValueError: If the declared size is invalid or above the configured maximum.
+        """
+        if total_size <= 0:
+            raise ValueError("Upload size must be positive")
+        if total_size > settings.MAX_FILE_SIZE:
+            raise ValueError(f"Upload exceeds the maximum size of {settings.MAX_FILE_SIZE} bytes")
+
+        upload_id = self.repo.create_upload(filename, total_size)
+        return {"upload_id": upload_id, "offset": 0, "size": total_size}
+
+    def get_upload(self, upload_id: str) -> Dict[str, Any]:
+        """Get an upload's filename, declared size and current offset."""
+        meta = self.repo.get_upload(upload_id)
+        return {
+            "upload_id": upload_id,
+            "filename": meta["filename"],
+            "offset": meta["offset"],
+            "size": meta["size"],
+        }
+
+    def write_chunk(self, upload_id: str, offset: int, chunk: bytes, checksum: Optional[str]) -> int:
+        """
+        Verify a chunk's checksum and write it at ``offset``.
+
+        Args:
+            upload_id (str): Identifier of the upload.
+            offset (int): Byte offset the chunk starts at.
+            chunk (bytes): Chunk content.
+            checksum (Optional[str]): Hex SHA-256 of the chunk.
+
+        Returns:
+            int: The new offset.
+
+        Raises:
+            FileNotFoundError: If the upload does not exist.
+            ValueError: If the checksum is missing or does not match, or the offset is wrong.
+        """
+        if not checksum:
+            raise ValueError("X-Chunk-SHA256 header required")
+        if not hmac.compare_digest(hashlib.sha256(chunk).hexdigest(), checksum.lower()):
+            raise ValueError("Chunk checksum mismatch")
+
+        try:
+            with self._locks[upload_id]:
+                return self.repo.write_chunk(upload_id, offset, chunk)
+        except FileNotFoundError:
+            # Do not keep a lock around for an unknown or expired id
+            self._locks.pop(upload_id, None)
+            raise
+
+    def finalize_upload(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Assemble a complete upload, or return the already assembled one on a retry.
+
+        Returns:
+            Dict[str, Any]: Metadata including ``path`` and original ``filename``.
+        """
+        try:
+            with self._locks[upload_id]:
+                return self.repo.finalize_upload(upload_id)
+        except FileNotFoundError:
+            self._locks.pop(upload_id, None)
+            raise
+
+    def delete_upload(self, upload_id: str) -> None:
+        """Remove an upload and its files."""
+        self.repo.delete_upload(upload_id)
+        self._locks.pop(upload_id, None)
+
+    def cleanup_stale_uploads(self) -> int:
+        """
+        Remove uploads abandoned for longer than the configured TTL.
+
+        Returns:
+            int: Number of uploads removed.
+        """
+        removed = self.repo.cleanup_stale_uploads(settings.UPLOAD_TTL)
+        for upload_id in removed:
+            self._locks.pop(upload_id, None)
+        return len(removed)
+
+
+# Singleton instance
+upload_service = UploadService()
@@ -0,0 +1,104 @@
+import hashlib
+import io
+import zipfile
+import pytest
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _chunk_headers(offset: int, chunk: bytes) -> dict:
+    return {"Upload-Offset": str(offset), "X-Chunk-SHA256": hashlib.sha256(chunk).hexdigest()}
+
+
+@pytest.mark.asyncio
+@pytest.mark.e2e
+async def test_chunked_upload_resumes_and_separates(test_client):
+    """Upload in chunks, recover from a rejected chunk via the offset query, then finalize"""
+    audio_bytes = Path("tests/e2e/assets/test_audio.flac").read_bytes()
+
+    response = await test_client.post("/uploads", json={"filename": "test_audio.flac", "size": len(audio_bytes)})
+    assert response.status_code == 201, response.text
+    upload_id = response.json()["upload_id"]
+
+    first = audio_bytes[:CHUNK_SIZE]
+    response = await test_client.patch(f"/uploads/{upload_id}", content=first, headers=_chunk_headers(0, first))
+    assert response.status_code == 200, response.text
+    assert response.json()["offset"] == len(first)
+
+    # A corrupted chunk is rejected and nothing is stored
+    second = audio_bytes[CHUNK_SIZE:2 * CHUNK_SIZE]
+    headers = _chunk_headers(CHUNK_SIZE, second)
+    response = await test_client.patch(f"/uploads/{upload_id}", content=second[:-1] + b"\0", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Chunk checksum mismatch"
+
+    # So is a chunk without a checksum
+    response = await test_client.patch(
+        f"/uploads/{upload_id}", content=second, headers={"Upload-Offset": str(CHUNK_SIZE)}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "X-Chunk-SHA256 header required"
+
+    # Replaying an old chunk reports the offset to resume from
+    response = await test_client.patch(f"/uploads/{upload_id}", content=first, headers=_chunk_headers(0, first))
+    assert response.status_code == 409
+    assert response.headers["upload-offset"] == str(CHUNK_SIZE)
+
+    # Finalizing early is refused
+    response = await test_client.post(f"/uploads/{upload_id}/finalize")
+    assert response.status_code == 409
+
+    response = await test_client.get(f"/uploads/{upload_id}")
+    offset = int(response.headers["upload-offset"])
+    while offset < len(audio_bytes):
+        chunk = audio_bytes[offset:offset + CHUNK_SIZE]
+        response = await test_client.patch(f"/uploads/{upload_id}", content=chunk, headers=_chunk_headers(offset, chunk))
+        assert response.status_code == 200, response.text
+        offset = response.json()["offset"]
+
+    response = await test_client.post(f"/uploads/{upload_id}/finalize")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content), "r") as z:
+        assert len(z.namelist()) == 4
+
+    # The upload is gone once it has been processed
+    response = await test_client.get(f"/uploads/{upload_id}")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.e2e
+async def test_finalize_can_be_retried_after_transient_failure(test_client, monkeypatch):
+    """A finalize rejected by admission control keeps the assembled upload for a retry"""
+    from services.audio_separation_service import audio_separation_service
+
+    audio_bytes = Path("tests/e2e/assets/test_audio.wav").read_bytes()
+    response = await test_client.post("/uploads", json={"filename": "test_audio.wav", "size": len(audio_bytes)})
+    upload_id = response.json()["upload_id"]
+    response = await test_client.patch(
+        f"/uploads/{upload_id}", content=audio_bytes, headers=_chunk_headers(0, audio_bytes)
+    )
+    assert response.status_code == 200, response.text
+
+    # Make the server look too slow to meet the deadline
+    admission = audio_separation_service.admission
+    monkeypatch.setattr(admission, "_rtf", {f"{audio_separation_service.model.model_name}:default": 1e6})
+    monkeypatch.setattr(admission, "_updated_at", {})
+    response = await test_client.post(f"/uploads/{upload_id}/finalize")
+    assert response.status_code == 503
+
+    response = await test_client.get(f"/uploads/{upload_id}")
+    assert response.status_code == 200
+    assert response.json()["offset"] == len(audio_bytes)
+
+    monkeypatch.undo()
+    response = await test_client.post(f"/uploads/{upload_id}/finalize")
+    assert response.status_code == 200, response.text
+    with zipfile.ZipFile(io.BytesIO(response.content), "r") as z:
+        assert len(z.namelist()) == 4
+
+    response = await test_client.get(f"/uploads/{upload_id}")
+    assert response.status_code == 404
+
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from pathlib import Path
+
+
+@pytest.mark.asyncio
+@pytest.mark.e2e
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+async def test_npy_output_is_memory_mappable(test_client, tmp_path, dtype):
+    """output_format=npy returns one [sources, channels, samples] array plus metadata headers"""
+    input_path = Path("tests/e2e/assets/test_audio.wav")
+    output_path = tmp_path / f"stems_{dtype}.npy"
+
+    with open(input_path, "rb") as f:
+        files = {"file": ("test_audio.wav", f, "audio/wav")}
+        data = {"output_format": "npy", "dtype": dtype}
+        response = await test_client.post("/separate", files=files, data=data)
+
+    assert response.status_code == 200, response.text
+    assert response.headers["x-sample-rate"] == "44100"
+    sources = response.headers["x-sources"].split(",")
+    assert len(sources) == 4
+
+    output_path.write_bytes(response.content)
+    stems = np.load(output_path, mmap_mode="r")
+    assert isinstance(stems, np.memmap)
+    assert stems.dtype == np.dtype(dtype)
+    assert stems.shape[:2] == (len(sources), 2)
+    # The 48kHz input is resampled to the model rate
+    assert abs(stems.shape[2] / 44100 - 2.874) < 0.01
+
+
+@pytest.mark.asyncio
+@pytest.mark.e2e
+async def test_unknown_output_format_is_rejected(test_client):
+    input_path = Path("tests/e2e/assets/test_audio.wav")
+
+    with open(input_path, "rb") as f:
+        files = {"file": ("test_audio.wav", f, "audio/wav")}
+        response = await test_client.post("/separate", files=files, data={"output_format": "mp3"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.e2e
+async def test_dtype_is_ignored_for_zip_output(test_client):
+    input_path = Path("tests/e2e/assets/test_audio.wav")
+
+    with open(input_path, "rb") as f:
+        files = {"file": ("test_audio.wav", f, "audio/wav")}
+        response = await test_client.post("/separate", files=files, data={"dtype": "int8"})
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/zip"
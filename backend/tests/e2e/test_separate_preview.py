@@ -0,0 +1,67 @@
+import io
+import zipfile
+import pytest
+import soundfile as sf
+from pathlib import Path
+
+
+@pytest.mark.asyncio
+@pytest.mark.e2e
+@pytest.mark.parametrize("filename, mime_type", [
+    ("test_audio.wav", "audio/wav"),
+    ("test_audio.flac", "audio/flac"),
+    ("test_audio.mp3", "audio/mpeg"),
+])
+async def test_preview_separates_only_the_excerpt(test_client, filename, mime_type):
+    """Preview endpoint returns stems covering just the requested time range"""
+    input_path = Path(f"tests/e2e/assets/{filename}")
+
+    with open(input_path, "rb") as f:
+        files = {"file": (filename, f, mime_type)}
+        data = {"start": "0.5", "duration": "1.0"}
+        response = await test_client.post("/separate/preview", files=files, data=data)
+
+    assert response.status_code == 200, f"Failed for {filename}: {response.text}"
+    assert response.headers["content-type"] == "application/zip"
+    assert float(response.headers["x-processing-time"]) > 0
+
+    with zipfile.ZipFile(io.BytesIO(response.content), "r") as z:
+        namelist = z.namelist()
+        assert len(namelist) == 4, f"Expected 4 files, got {len(namelist)} for {filename}"
+        for name in namelist:
+            info = sf.info(io.BytesIO(z.read(name)))
+            # One second at the model sample rate, allowing for decoder padding
+            assert abs(info.duration - 1.0) < 0.05, f"{name} is {info.duration}s for {filename}"
+
+
+@pytest.mark.asyncio
+@pytest.mark.e2e
+async def test_preview_rejects_range_past_end(test_client):
+    """A start offset beyond the end of the file is a client error"""
+    input_path = Path("tests/e2e/assets/test_audio.wav")
+
+    with open(input_path, "rb") as f:
+        files = {"file": ("test_audio.wav", f, "audio/wav")}
+        response = await test_client.post("/separate/preview", files=files, data={"start": "60"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.e2e
+@pytest.mark.parametrize("data", [
+    {"start": "nan"},
+    {"duration": "nan"},
+    {"start": "inf"},
+    {"duration": "-1"},
+])
+async def test_preview_rejects_invalid_range(test_client, data):
+    """Negative, zero and non-finite ranges are client errors"""
+    input_path = Path("tests/e2e/assets/test_audio.wav")
+
+    with open(input_path, "rb") as f:
+        files = {"file": ("test_audio.wav", f, "audio/wav")}
+        response = await test_client.post("/separate/preview", files=files, data=data)
+
+    assert response.status_code == 400
+    assert "finite" in response.json()["detail"]
@@ -0,0 +1,95 @@
+import time
+import pytest
+import torch
+from demucs.apply import apply_model
+from infra.cancellation import CancellablePool, CancellationToken, SeparationCancelled
+from services.admission_control import AdmissionController, AdmissionRejected
+
+
+class _CountingModel(torch.nn.Module):
+    """Minimal stand-in for a Demucs model that counts forward passes."""
+    sources = ["drums", "bass", "other", "vocals"]
+    samplerate = 44100
+    segment = 1.0
+
+    def __init__(self, on_forward=None):
+        super().__init__()
+        self.calls = 0
+        self.on_forward = on_forward
+
+    def forward(self, mix):
+        self.calls += 1
+        if self.on_forward:
+            self.on_forward()
+        return mix.unsqueeze(1).repeat(1, len(self.sources), 1, 1)
+
+
+@pytest.mark.unit
+def test_rejects_jobs_that_cannot_finish_before_deadline():
+    """Estimates follow the observed real-time factor"""
+    admission = AdmissionController(initial_rtf=1.0, smoothing=0.5, safety_factor=1.0)
+    deadline = time.monotonic() + 5
+
+    admission.observe("htdemucs", "default", audio_seconds=10, elapsed_seconds=10)
+    with pytest.raises(AdmissionRejected):
+        admission.check("htdemucs", "default", audio_seconds=10, deadline=deadline)
+
+    # Fast observed runs bring the estimate for 10s of audio below the deadline
+    admission.observe("htdemucs", "default", audio_seconds=100, elapsed_seconds=10)
+    admission.observe("htdemucs", "default", audio_seconds=100, elapsed_seconds=10)
+    assert admission.estimate("htdemucs", "default", 10) == pytest.approx(3.25)
+    assert admission.check("htdemucs", "default", audio_seconds=10, deadline=deadline)
+
+    # Presets are tracked separately, and a preset without observations is not rejected
+    assert not admission.check("htdemucs", "fast", audio_seconds=10, deadline=deadline)
+
+
+@pytest.mark.unit
+def test_cold_controller_does_not_permanently_reject_long_audio():
+    """Long tracks are admitted until measured, and a stale estimate is re-measured"""
+    admission = AdmissionController(initial_rtf=1.0, safety_factor=1.2, stale_after=0.05)
+    # Longer than the deadline allows at the initial real-time factor
+    for _ in range(3):
+        assert not admission.check("htdemucs", "default", audio_seconds=400, deadline=time.monotonic() + 300)
+
+    # A slow measured run makes the estimate reject
+    admission.observe("htdemucs", "default", audio_seconds=10, elapsed_seconds=10)
+    with pytest.raises(AdmissionRejected):
+        admission.check("htdemucs", "default", audio_seconds=400, deadline=time.monotonic() + 300)
+
+    # Once stale, one job is let through to re-measure, the next is rejected again
+    time.sleep(0.1)
+    assert not admission.check("htdemucs", "default", audio_seconds=400, deadline=time.monotonic() + 300)
+    with pytest.raises(AdmissionRejected):
+        admission.check("htdemucs", "default", audio_seconds=400, deadline=time.monotonic() + 300)
+
+    # The probe's fast run replaces the stale estimate instead of being averaged with it
+    time.sleep(0.1)
+    admission.observe("htdemucs", "default", audio_seconds=100, elapsed_seconds=30)
+    assert admission.estimate("htdemucs", "default", 400) == pytest.approx(144.0)
+    assert admission.check("htdemucs", "default", audio_seconds=400, deadline=time.monotonic() + 300)
+
+
+@pytest.mark.unit
+def test_cancellation_stops_inference_at_segment_boundary():
+    """Cancelling mid-run skips every remaining segment"""
+    token = CancellationToken()
+    model = _CountingModel(on_forward=token.cancel)
+    mix = torch.zeros(1, 2, 44100 * 10)
+
+    with pytest.raises(SeparationCancelled):
+        apply_model(model, mix, shifts=0, split=True, overlap=0.25, pool=CancellablePool(token))
+
+    assert model.calls == 1
+
+
+@pytest.mark.unit
+def test_expired_deadline_stops_inference():
+    """A token past its deadline is treated as cancelled"""
+    token = CancellationToken(deadline=time.monotonic() - 1)
+    model = _CountingModel()
+
+    with pytest.raises(SeparationCancelled):
+        apply_model(model, torch.zeros(1, 2, 44100 * 3), shifts=0, split=True, pool=CancellablePool(token))
+
+    assert model.calls == 0
@@ -0,0 +1,124 @@
+import json
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+import batch
+
+SOURCES = ["drums", "bass", "other", "vocals"]
+EXTENSIONS = (".wav", ".flac", ".mp3")
+
+
+def _touch(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+    return path
+
+
+@pytest.mark.unit
+def test_find_tracks_filters_extensions_and_skips_output(tmp_path):
+    root = tmp_path / "catalog"
+    song = _touch(root / "b" / "song.WAV")
+    other = _touch(root / "a.flac")
+    _touch(root / "notes.txt")
+    # Stems of a previous run written inside the input directory
+    output_root = root / "stems"
+    _touch(output_root / "catalog" / "a.flac" / "vocals.wav")
+
+    tracks = list(batch.find_tracks([root], EXTENSIONS, exclude=output_root))
+
+    assert tracks == [(root, other), (root, song)]
+
+
+@pytest.mark.unit
+def test_stem_output_dir_mirrors_input_and_keeps_extension(tmp_path):
+    root = tmp_path / "catalog"
+    output_root = tmp_path / "out"
+
+    wav_dir = batch.stem_output_dir(output_root, root, root / "album" / "song.wav")
+    flac_dir = batch.stem_output_dir(output_root, root, root / "album" / "song.flac")
+
+    assert wav_dir == output_root / "catalog" / "album" / "song.wav"
+    assert wav_dir != flac_dir
+
+
+@pytest.mark.unit
+def test_load_manifest_ignores_failures_and_truncated_last_line(tmp_path):
+    manifest_path = tmp_path / batch.MANIFEST_NAME
+    lines = [
+        json.dumps({"input": "/a.wav", "status": "done"}),
+        json.dumps({"input": "/b.wav", "status": "failed", "error": "boom"}),
+        json.dumps({"input": "/c.wav", "status": "done"})[:-5],
+    ]
+    manifest_path.write_text("\n".join(lines))
+
+    assert batch.load_manifest(manifest_path) == {"/a.wav"}
+    assert batch.load_manifest(tmp_path / "missing.jsonl") == set()
+
+
+@pytest.mark.unit
+def test_separate_track_skips_when_all_stems_exist(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("track should not be separated")
+
+    monkeypatch.setattr(batch, "_model", SimpleNamespace(get_source_names=lambda: SOURCES, separate_waveform=fail))
+    monkeypatch.setattr(batch, "_processor", SimpleNamespace(load_waveform=fail))
+    for name in SOURCES:
+        _touch(tmp_path / f"{name}.wav")
+
+    result = batch._separate_track(("/catalog/song.wav", str(tmp_path), "default"))
+
+    assert result == {"input": "/catalog/song.wav", "status": "skipped"}
+
+
+@pytest.mark.unit
+def test_separate_track_raises_if_worker_failed_to_start(monkeypatch):
+    """A failed worker start stops the run instead of respawning workers forever"""
+    def fail(name):
+        raise ValueError("no such model")
+
+    # Keep the test process' own torch thread settings untouched
+    monkeypatch.setattr(batch, "torch", SimpleNamespace(set_num_threads=lambda n: None, set_num_interop_threads=lambda n: None))
+    monkeypatch.setattr(batch, "DemucsModel", fail)
+    monkeypatch.setattr(batch, "_init_error", None)
+    batch._init_worker("missing", threads=1)
+
+    with pytest.raises(RuntimeError, match="no such model"):
+        batch._separate_track(("/catalog/song.wav", "/out", "default"))
+
+
+@pytest.mark.unit
+def test_run_fails_fast_on_model_load_error(tmp_path, monkeypatch):
+    def fail(name):
+        raise ValueError(f"no such model {name}")
+
+    monkeypatch.setattr(batch, "get_model", fail)
+    _touch(tmp_path / "catalog" / "song.wav")
+    args = batch.parse_args([str(tmp_path / "catalog"), "-o", str(tmp_path / "out"), "--model", "missing"])
+
+    with pytest.raises(RuntimeError, match="Could not load model 'missing'"):
+        batch.run(args)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("extra_args", [["--threads", "0"], ["--workers", "0"]])
+def test_parse_args_rejects_non_positive_counts(tmp_path, extra_args):
+    with pytest.raises(SystemExit):
+        batch.parse_args([str(tmp_path), "-o", str(tmp_path / "out"), *extra_args])
+
+
+@pytest.mark.unit
+def test_parse_args_rejects_inputs_with_the_same_name(tmp_path):
+    (tmp_path / "a" / "music").mkdir(parents=True)
+    (tmp_path / "b" / "music").mkdir(parents=True)
+
+    with pytest.raises(SystemExit):
+        batch.parse_args([str(tmp_path / "a" / "music"), str(tmp_path / "b" / "music"), "-o", str(tmp_path / "out")])
+
+
+@pytest.mark.unit
+def test_parse_args_rejects_unknown_preset(tmp_path):
+    with pytest.raises(SystemExit):
+        batch.parse_args([str(tmp_path), "-o", str(tmp_path / "out"), "--preset", "nope"])
+
+    args = batch.parse_args([str(tmp_path), "-o", str(tmp_path / "out"), "--preset", "default"])
+    assert args.preset == "default"
@@ -0,0 +1,79 @@
+import threading
+import time
+import pytest
+import torch
+from api import profiles
+from api.profiles import is_profiling_authorized
+from infra.profiler import RequestProfiler
+
+
+def _stub_stage(x):
+    """Small torch workload standing in for a pipeline stage."""
+    time.sleep(0.05)
+    return (torch.ones(8, 8) @ torch.ones(8, 8)).sum().item() + x
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("enabled, debug, token, header, expected", [
+    (False, True, "", "1", False),           # disabled in config
+    (True, True, "", None, False),           # no header
+    (True, True, "", "anything", True),      # development accepts any value
+    (True, False, "secret", "secret", True),  # token match
+    (True, False, "secret", "wrong", False),  # token mismatch
+    (True, False, "", "", False),            # empty token never matches
+    (True, False, "", "anything", False),
+])
+def test_is_profiling_authorized(monkeypatch, enabled, debug, token, header, expected):
+    monkeypatch.setattr(profiles.settings, "PROFILING_ENABLED", enabled)
+    monkeypatch.setattr(profiles.settings, "DEBUG", debug)
+    monkeypatch.setattr(profiles.settings, "PROFILING_TOKEN", token)
+
+    assert is_profiling_authorized(header) is expected
+
+
+@pytest.mark.unit
+def test_profiled_call_writes_traces_listed_by_index(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+
+    result = profiler.wrap(_stub_stage, "req1", "separate")(1)
+
+    assert result == 513.0
+    names = {trace["name"] for trace in profiler.list_traces()}
+    assert names == {"req1_separate.trace.json", "req1_separate.pstats"}
+    for name in names:
+        assert profiler.get_trace_path(name).stat().st_size > 2
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name", ["../etc/passwd", "../req1_separate.pstats", "notes.txt", "missing.pstats"])
+def test_get_trace_path_rejects_non_traces(tmp_path, name):
+    (tmp_path.parent / "req1_separate.pstats").write_bytes(b"outside")
+    (tmp_path / "notes.txt").write_text("not a trace")
+    profiler = RequestProfiler(str(tmp_path))
+
+    with pytest.raises(FileNotFoundError):
+        profiler.get_trace_path(name)
+
+
+@pytest.mark.unit
+def test_overlapping_captures_do_not_fail_calls(tmp_path):
+    """A capture that starts while another runs executes unprofiled instead of failing"""
+    profiler = RequestProfiler(str(tmp_path))
+    results, errors = [], []
+
+    def call(profile_id):
+        try:
+            results.append(profiler.run(profile_id, "separate", _stub_stage, 0))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(f"req{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert results == [512.0] * 4
+    for trace in profiler.list_traces():
+        assert trace["size"] > 2
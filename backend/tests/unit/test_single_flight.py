@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+import pytest
+import torch
+from pathlib import Path
+from types import SimpleNamespace
+from infra import demucs_model
+from infra.demucs_model import DEFAULT_PRESETS, DemucsModel
+from services.admission_control import AdmissionRejected
+from services.audio_separation_service import AudioSeparationService
+
+SOURCES = ["drums", "bass", "other", "vocals"]
+INPUT_PATH = Path("tests/e2e/assets/test_audio.wav")
+
+
+@pytest.fixture
+def apply_model_calls(monkeypatch):
+    """Replace Demucs inference with a slow stub that counts its calls."""
+    calls = []
+    lock = threading.Lock()
+
+    def fake_apply_model(model, mix, **kwargs):
+        with lock:
+            calls.append(mix.shape)
+        time.sleep(0.5)
+        return torch.zeros(mix.shape[0], len(model.sources), *mix.shape[1:])
+
+    monkeypatch.setattr(demucs_model, "apply_model", fake_apply_model)
+    return calls
+
+
+@pytest.fixture
+def service():
+    """Separation service backed by a stub model, so no weights are loaded."""
+    model = DemucsModel.__new__(DemucsModel)
+    model.model_name = "stub"
+    model.device = torch.device("cpu")
+    model.model = SimpleNamespace(sources=SOURCES)
+    model.presets = DEFAULT_PRESETS
+    return AudioSeparationService(model=model)
+
+
+@pytest.mark.unit
+async def test_concurrent_identical_uploads_run_inference_once(service, apply_model_calls):
+    """N concurrent identical uploads attach to one computation and share its result."""
+    audio_bytes = INPUT_PATH.read_bytes()
+
+    results = await asyncio.gather(*[
+        service.separate_audio(audio_bytes, INPUT_PATH.name) for _ in range(8)
+    ])
+
+    assert len(apply_model_calls) == 1
+    assert all(result == results[0] for result in results)
+    assert not service._in_flight
+
+
+@pytest.mark.unit
+async def test_computation_survives_until_last_waiter_cancels(service, apply_model_calls):
+    """Cancelling one waiter leaves the shared computation running for the others."""
+    audio_bytes = INPUT_PATH.read_bytes()
+
+    first = asyncio.create_task(service.separate_audio(audio_bytes, INPUT_PATH.name))
+    second = asyncio.create_task(service.separate_audio(audio_bytes, INPUT_PATH.name))
+    await asyncio.sleep(0.1)
+    first.cancel()
+
+    result = await second
+    assert result
+    assert first.cancelled()
+    assert len(apply_model_calls) == 1
+
+
+@pytest.mark.unit
+async def test_last_waiter_cancelling_stops_inference(service, monkeypatch):
+    """When every waiter has gone away, running inference is told to stop"""
+    tokens = []
+
+    def fake_apply_model(model, mix, pool=None, **kwargs):
+        tokens.append(pool.token)
+        while not pool.token.cancelled:
+            time.sleep(0.01)
+        return torch.zeros(mix.shape[0], len(model.sources), *mix.shape[1:])
+
+    monkeypatch.setattr(demucs_model, "apply_model", fake_apply_model)
+    audio_bytes = INPUT_PATH.read_bytes()
+
+    waiters = [asyncio.create_task(service.separate_audio(audio_bytes, INPUT_PATH.name)) for _ in range(2)]
+    while not tokens:
+        await asyncio.sleep(0.01)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert tokens[0].cancelled
+    assert not service._in_flight
+
+
+@pytest.mark.unit
+async def test_waiters_are_admitted_against_their_own_deadline(service, apply_model_calls):
+    """A coalesced waiter with a short deadline is rejected without failing a patient one"""
+    # Measured estimate of about 5s for the ~2.9s test file
+    service.admission.observe(service.model.model_name, "default", audio_seconds=10, elapsed_seconds=15)
+    audio_bytes = INPUT_PATH.read_bytes()
+
+    patient = asyncio.create_task(
+        service.separate_audio(audio_bytes, INPUT_PATH.name, deadline=time.monotonic() + 30)
+    )
+    await asyncio.sleep(0)
+    hurried = asyncio.create_task(
+        service.separate_audio(audio_bytes, INPUT_PATH.name, deadline=time.monotonic() + 2)
+    )
+
+    with pytest.raises(AdmissionRejected):
+        await hurried
+    assert await patient
+    assert len(apply_model_calls) == 1
+
+
+@pytest.mark.unit
+async def test_cancelling_profiled_request_stops_inference(service, monkeypatch, tmp_path):
+    """A profiled request runs outside coalescing but still stops when cancelled"""
+    tokens = []
+
+    def fake_apply_model(model, mix, pool=None, **kwargs):
+        tokens.append(pool.token)
+        # Bounded, so a missed cancellation fails the test instead of hanging it
+        for _ in range(300):
+            if pool.token.cancelled:
+                break
+            time.sleep(0.01)
+        return torch.zeros(mix.shape[0], len(model.sources), *mix.shape[1:])
+
+    monkeypatch.setattr(demucs_model, "apply_model", fake_apply_model)
+    monkeypatch.setattr(service.profiler, "output_dir", tmp_path)
+
+    request = asyncio.create_task(
+        service.separate_audio(INPUT_PATH.read_bytes(), INPUT_PATH.name, profile_id="req1")
+    )
+    while not tokens:
+        await asyncio.sleep(0.01)
+    request.cancel()
+    await asyncio.gather(request, return_exceptions=True)
+
+    assert tokens[0].cancelled
+
+
+@pytest.mark.unit
+async def test_zip_requests_coalesce_regardless_of_dtype(service, apply_model_calls):
+    """dtype only shapes .npy output, so ZIP requests differing in it share one computation"""
+    audio_bytes = INPUT_PATH.read_bytes()
+
+    await asyncio.gather(*[
+        service.separate_audio(audio_bytes, INPUT_PATH.name, dtype=dtype) for dtype in ("float32", "float16")
+    ])
+
+    assert len(apply_model_calls) == 1